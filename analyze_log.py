@@ -1,6 +1,12 @@
-import csv
 import argparse
-from collections import Counter, defaultdict
+import datetime
+import io
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
 
 # --- Constants (can be adjusted if your main script's constants change) ---
 DEFAULT_THROTTLE_DEADZONE_LOW = 0.05
@@ -8,225 +14,323 @@ DEFAULT_LIGHT_BLIP_GESTURE_COOLDOWN = 0.25
 SUSPICIOUSLY_HIGH_IDLE_THROTTLE = 0.10 
 RAPID_BLIP_THRESHOLD_SECONDS = 0.15 
 
-def parse_value(value_str):
-    """Attempt to convert string value to bool, int, float, or keep as string."""
-    if value_str is None: return None
-    val_lower = value_str.lower()
-    if val_lower == 'true': return True
-    if val_lower == 'false': return False
-    try: return int(value_str)
-    except ValueError:
-        try: return float(value_str)
-        except ValueError: return value_str
-
-def load_and_parse_csv(filepath):
-    data = []
+# Known column types, so each cell is converted once by the C parser instead of inferred
+COLUMN_DTYPES = {
+    'timestamp_unix': 'float64',
+    'dt': 'float64',
+    'raw_throttle_input_pct': 'float64',
+    'smoothed_throttle_pct': 'float64',
+    'sim_peak_thr_gesture': 'float64',
+    'sim_last_blip_time': 'float64',
+    'active_blip_count': 'Int64',
+    'sim_in_pot_gesture': 'boolean',
+    'state': 'category', # Low-cardinality strings: one code per row plus a small category table
+    'sfx_chan_sound': 'category',
+}
+
+# SFX channel contents that don't count as a non-gesture sound effect during idle
+SFX_IDLE_WHITELIST = frozenset({'None', 'engine_idle_loop.wav'})
+
+# Only these columns are read from the log; everything else is skipped by the parser
+ANALYZED_COLUMNS = frozenset(COLUMN_DTYPES) | {'datetime_iso'}
+
+# Fallback values for columns that may be missing from (or empty in) a log
+COLUMN_DEFAULTS = {
+    'dt': 1/60.0,
+    'raw_throttle_input_pct': 0.0,
+    'smoothed_throttle_pct': 0.0,
+    'state': 'UNKNOWN',
+    'active_blip_count': 0,
+    'sim_last_blip_time': 0.0,
+    'sim_in_pot_gesture': False,
+    'sim_peak_thr_gesture': 0.0,
+    'sfx_chan_sound': 'None',
+}
+
+# Parsed logs are cached next to the CSV (needs pyarrow; without it every run parses the CSV)
+PARSE_CACHE_SUFFIX = '.parquet'
+# Bump when the read_csv options change in a way COLUMN_DTYPES doesn't capture
+PARSE_CACHE_VERSION = 1
+# Stored in the cache's metadata, so a cache parsed with different dtypes is not reused
+PARSE_CACHE_SCHEMA = f"{PARSE_CACHE_VERSION}:{sorted(COLUMN_DTYPES.items())}"
+
+def _read_parse_cache(filepath, cache_path):
+    """Return the cached parse of filepath, or None if it is missing, older than the CSV, or stale.
+
+    A cache is stale if it was written under another PARSE_CACHE_SCHEMA or covers other columns.
+    """
     try:
-        with open(filepath, 'r', newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            if not reader.fieldnames:
-                print(f"Error: CSV file '{filepath}' is empty or has no header row.")
-                return None
-            for i, row_dict in enumerate(reader):
-                parsed_row = {}
-                for key, value_str in row_dict.items():
-                    parsed_row[key] = parse_value(value_str)
-                
-                parsed_row.setdefault('timestamp_unix', float(i))
-                parsed_row.setdefault('dt', 1/60.0) 
-                parsed_row.setdefault('raw_throttle_input_pct', 0.0) 
-                parsed_row.setdefault('smoothed_throttle_pct', 0.0)
-                parsed_row.setdefault('state', 'UNKNOWN')
-                parsed_row.setdefault('active_blip_count', 0)
-                parsed_row.setdefault('sim_last_blip_time', 0.0)
-                parsed_row.setdefault('sim_in_pot_gesture', False)
-                parsed_row.setdefault('sim_peak_thr_gesture', 0.0)
-
-                data.append(parsed_row)
+        if os.path.getmtime(cache_path) < os.path.getmtime(filepath):
+            return None
+        df = pd.read_parquet(cache_path)
+        # A cache written before ANALYZED_COLUMNS changed would otherwise silently miss columns
+        csv_columns = {col for col in pd.read_csv(filepath, nrows=0).columns if col in ANALYZED_COLUMNS}
+    except (OSError, ImportError, ValueError):
+        return None
+    if df.attrs.get('parse_schema') != PARSE_CACHE_SCHEMA or set(df.columns) != csv_columns:
+        return None
+    return df
+
+def _write_parse_cache(df, cache_path):
+    df.attrs['parse_schema'] = PARSE_CACHE_SCHEMA # Round-trips through the Parquet metadata
+    try:
+        df.to_parquet(cache_path, compression='zstd')
+    except ImportError:
+        pass # No Parquet engine installed; caching is simply skipped
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not write parse cache '{cache_path}': {e}")
+
+def load_and_parse_csv(filepath, use_cache=True):
+    """Load the log CSV into a DataFrame, filling in columns older logs may lack.
+
+    With use_cache, the parse is reused from '<filepath>.parquet' when that file is at
+    least as new as the CSV, and written there after a fresh parse otherwise.
+    """
+    cache_path = filepath + PARSE_CACHE_SUFFIX
+    df = _read_parse_cache(filepath, cache_path) if use_cache else None
+    if df is not None:
+        print(f"Using cached parse: {cache_path}")
+    else:
+        df = _parse_csv(filepath)
+        if df is None:
+            return None
+        if use_cache:
+            _write_parse_cache(df, cache_path)
+
+    if 'timestamp_unix' not in df.columns:
+        df['timestamp_unix'] = np.arange(len(df), dtype=float)
+    for col, default in COLUMN_DEFAULTS.items():
+        if col not in df.columns:
+            df[col] = default
+        elif df[col].hasnans:
+            if isinstance(df[col].dtype, pd.CategoricalDtype) and default not in df[col].cat.categories:
+                df[col] = df[col].cat.add_categories([default])
+            df[col] = df[col].fillna(default)
+    return df
+
+def _parse_csv(filepath):
+    """Parse the analyzed columns of the log CSV; None (after saying why) if it is unusable."""
+    try:
+        # Keep 'None' sound names as strings; only empty cells are missing values
+        df = pd.read_csv(filepath, dtype=COLUMN_DTYPES, usecols=lambda col: col in ANALYZED_COLUMNS,
+                         true_values=['True', 'true'], false_values=['False', 'false'],
+                         keep_default_na=False, na_values=[''])
     except FileNotFoundError:
         print(f"Error: Log file not found at '{filepath}'")
         return None
+    except pd.errors.EmptyDataError:
+        print(f"Error: CSV file '{filepath}' is empty or has no header row.")
+        return None
     except Exception as e:
         print(f"Error reading or parsing CSV file '{filepath}': {e}")
         import traceback
         traceback.print_exc()
         return None
-    if not data:
+    if df.empty:
         print(f"Log file '{filepath}' is empty or could not be parsed into data.")
         return None
-    return data
-
-def print_log_excerpt(log_data, index, window=2, label=""):
-    print(f"\n--- Log Excerpt: {label} (around index {index}, timestamp {log_data[index].get('timestamp_unix', 'N/A'):.2f}) ---")
+    return df
+
+# Contiguous per-column arrays for the analyzers (state and SFX are stored as codes into name tables)
+LogColumns = namedtuple('LogColumns', [
+    'timestamp_unix', 'dt', 'raw_throttle_input_pct', 'smoothed_throttle_pct',
+    'sim_last_blip_time', 'sim_peak_thr_gesture', 'sim_in_pot_gesture', 'active_blip_count',
+    'state_codes', 'state_names', 'sfx_codes', 'sfx_names', 'datetime_iso',
+])
+
+def _category_codes(series):
+    """Integer codes and the matching name table for a (possibly already categorical) string column."""
+    categorical = series.astype('category')
+    return categorical.cat.codes.to_numpy(), categorical.cat.categories.to_numpy(dtype=str)
+
+def build_log_columns(df):
+    """Collect the analyzed columns of the DataFrame as flat arrays.
+
+    The result holds everything the analyzers and excerpts need. The numeric arrays are
+    views of the DataFrame's blocks rather than copies, so they keep that memory alive.
+    datetime_iso is None for logs that don't record it.
+    """
+    state_codes, state_names = _category_codes(df['state'])
+    sfx_codes, sfx_names = _category_codes(df['sfx_chan_sound'])
+    # Kept as the parser's string array; a fixed-width NumPy copy would be larger than the rest combined
+    datetime_iso = df['datetime_iso'].array if 'datetime_iso' in df.columns else None
+    return LogColumns(
+        timestamp_unix=df['timestamp_unix'].to_numpy(dtype=np.float64),
+        dt=df['dt'].to_numpy(dtype=np.float64),
+        raw_throttle_input_pct=df['raw_throttle_input_pct'].to_numpy(dtype=np.float64),
+        smoothed_throttle_pct=df['smoothed_throttle_pct'].to_numpy(dtype=np.float64),
+        sim_last_blip_time=df['sim_last_blip_time'].to_numpy(dtype=np.float64),
+        sim_peak_thr_gesture=df['sim_peak_thr_gesture'].to_numpy(dtype=np.float64),
+        sim_in_pot_gesture=df['sim_in_pot_gesture'].to_numpy(dtype=bool),
+        active_blip_count=df['active_blip_count'].to_numpy(dtype=np.int64),
+        state_codes=state_codes,
+        state_names=state_names,
+        sfx_codes=sfx_codes,
+        sfx_names=sfx_names,
+        datetime_iso=datetime_iso,
+    )
+
+def _find_rapid_pairs(sim_times, log_times, cooldown, rapid_thresh):
+    """Indices i where events i and i+1 are closer than the cooldown or the rapid threshold."""
+    return np.flatnonzero((np.diff(sim_times) < cooldown) | (np.diff(log_times) < rapid_thresh))
+
+EXCERPT_HEADERS = [
+    'datetime_iso', 'timestamp_unix', 'state', 
+    'raw_throttle_input_pct', 'smoothed_throttle_pct', 
+    'sim_in_pot_gesture', 'sim_peak_thr_gesture',
+    'active_blip_count', 'sim_last_blip_time', 'sfx_chan_sound'
+]
+
+def _format_excerpt_column(cols, header, start, end):
+    """Display strings for one excerpt column over rows [start, end); the format is picked once per column."""
+    if header == 'datetime_iso':
+        if cols.datetime_iso is not None:
+            return list(cols.datetime_iso[start:end])
+        # Newer logs omit 'datetime_iso'; derive it from 'timestamp_unix'
+        return [datetime.datetime.fromtimestamp(ts).isoformat() for ts in cols.timestamp_unix[start:end].tolist()]
+    if header == 'state':
+        return list(cols.state_names[cols.state_codes[start:end]])
+    if header == 'sfx_chan_sound':
+        return list(cols.sfx_names[cols.sfx_codes[start:end]])
+    values = getattr(cols, header)[start:end]
+    fmt = '%.3f' if values.dtype.kind == 'f' else '%s'
+    return [fmt % v for v in values.tolist()]
+
+def print_log_excerpt(cols, index, window=2, label="", out=None):
+    print(f"\n--- Log Excerpt: {label} (around index {index}, timestamp {cols.timestamp_unix[index]:.2f}) ---", file=out)
     start = max(0, index - window)
-    end = min(len(log_data), index + window + 1)
-    if not log_data: return
-
-    relevant_headers = [
-        'datetime_iso', 'timestamp_unix', 'state', 
-        'raw_throttle_input_pct', 'smoothed_throttle_pct', 
-        'sim_in_pot_gesture', 'sim_peak_thr_gesture',
-        'active_blip_count', 'sim_last_blip_time', 'sfx_chan_sound'
-    ]
-    actual_headers = [h for h in relevant_headers if h in log_data[0]] 
-    if not actual_headers: 
-        actual_headers = list(log_data[0].keys())[:8] 
-
-    print(" | ".join(actual_headers))
-
-    for i in range(start, end):
-        row_values = []
-        for h in actual_headers:
-            val = log_data[i].get(h, 'N/A')
-            if isinstance(val, float):
-                val = f"{val:.3f}"
-            row_values.append(str(val))
+    end = min(len(cols.timestamp_unix), index + window + 1)
+
+    print(" | ".join(EXCERPT_HEADERS), file=out)
+
+    columns = [_format_excerpt_column(cols, h, start, end) for h in EXCERPT_HEADERS]
+    for i, row_values in enumerate(zip(*columns), start):
         marker = " *** " if i == index else "     "
-        print(marker + " | ".join(row_values))
-    print("--- End Excerpt ---")
+        print(marker + " | ".join(row_values), file=out)
+    print("--- End Excerpt ---", file=out)
 
 
-def analyze_general_stats(log_data):
-    print("\n--- General Statistics ---")
-    if not log_data:
-        print("No data to analyze.")
+def analyze_general_stats(cols, out=None):
+    print("\n--- General Statistics ---", file=out)
+    total_entries = len(cols.timestamp_unix)
+    if total_entries == 0:
+        print("No data to analyze.", file=out)
         return
 
-    total_entries = len(log_data)
-    print(f"Total log entries: {total_entries}")
-
-    first_ts = log_data[0].get('timestamp_unix', 0.0)
-    last_ts = log_data[-1].get('timestamp_unix', 0.0)
-    total_duration = last_ts - first_ts if total_entries > 1 else 0.0
-    print(f"Total log duration: {total_duration:.2f} seconds")
-
-    state_counts = Counter(row['state'] for row in log_data if 'state' in row)
-    state_time = defaultdict(float)
-    for row in log_data:
-        state_time[row.get('state','UNKNOWN')] += row.get('dt', 1/60.0)
-
-    print("\nEngine State Distribution (by entry count):")
-    for state, count in state_counts.most_common():
-        print(f"  {state:<20}: {count} entries ({count/total_entries*100:.1f}%)")
-
-    print("\nEngine State Distribution (by summed 'dt' time):")
-    for state, time_spent in sorted(state_time.items(), key=lambda item: item[1], reverse=True):
-        print(f"  {state:<20}: {time_spent:.2f} seconds")
-
-    raw_throttle_values = [row['raw_throttle_input_pct'] for row in log_data if 'raw_throttle_input_pct' in row]
-    if raw_throttle_values:
-        print("\nRaw Throttle Input Statistics (from 'raw_throttle_input_pct'):")
-        print(f"  Min raw throttle: {min(raw_throttle_values):.3f}")
-        print(f"  Max raw throttle: {max(raw_throttle_values):.3f}")
-        print(f"  Avg raw throttle: {sum(raw_throttle_values)/len(raw_throttle_values):.3f}")
-    else:
-        print("\nNo 'raw_throttle_input_pct' data found for statistics.")
-        
-    smoothed_throttle_values = [row['smoothed_throttle_pct'] for row in log_data if 'smoothed_throttle_pct' in row]
-    if smoothed_throttle_values:
-        print("\nSmoothed Throttle Input Statistics (from 'smoothed_throttle_pct'):")
-        print(f"  Min smoothed throttle: {min(smoothed_throttle_values):.3f}")
-        print(f"  Max smoothed throttle: {max(smoothed_throttle_values):.3f}")
-        print(f"  Avg smoothed throttle: {sum(smoothed_throttle_values)/len(smoothed_throttle_values):.3f}")
-    print("--- End General Statistics ---")
-
-def analyze_throttle_anomalies(log_data, deadzone_low_arg, high_idle_throttle_threshold_arg): # Renamed args to avoid clash
-    print(f"\n--- Throttle Anomaly Analysis (Raw Idle Throttle > {high_idle_throttle_threshold_arg*100:.0f}%) ---")
-    anomalies_found = 0
-    if not log_data:
-        print("No data to analyze.")
+    print(f"Total log entries: {total_entries}", file=out)
+
+    timestamps = cols.timestamp_unix
+    total_duration = timestamps[-1] - timestamps[0] if total_entries > 1 else 0.0
+    print(f"Total log duration: {total_duration:.2f} seconds", file=out)
+
+    num_states = len(cols.state_names)
+    state_counts = np.bincount(cols.state_codes, minlength=num_states)
+    state_time = np.bincount(cols.state_codes, weights=cols.dt, minlength=num_states)
+
+    print("\nEngine State Distribution (by entry count):", file=out)
+    for code in np.argsort(-state_counts, kind='stable'):
+        count = state_counts[code]
+        print(f"  {cols.state_names[code]:<20}: {count} entries ({count/total_entries*100:.1f}%)", file=out)
+
+    print("\nEngine State Distribution (by summed 'dt' time):", file=out)
+    for code in np.argsort(-state_time, kind='stable'):
+        print(f"  {cols.state_names[code]:<20}: {state_time[code]:.2f} seconds", file=out)
+
+    raw = cols.raw_throttle_input_pct
+    print("\nRaw Throttle Input Statistics (from 'raw_throttle_input_pct'):", file=out)
+    print(f"  Min raw throttle: {raw.min():.3f}", file=out)
+    print(f"  Max raw throttle: {raw.max():.3f}", file=out)
+    print(f"  Avg raw throttle: {raw.mean():.3f}", file=out)
+
+    smoothed = cols.smoothed_throttle_pct
+    print("\nSmoothed Throttle Input Statistics (from 'smoothed_throttle_pct'):", file=out)
+    print(f"  Min smoothed throttle: {smoothed.min():.3f}", file=out)
+    print(f"  Max smoothed throttle: {smoothed.max():.3f}", file=out)
+    print(f"  Avg smoothed throttle: {smoothed.mean():.3f}", file=out)
+    print("--- End General Statistics ---", file=out)
+
+def analyze_throttle_anomalies(cols, deadzone_low_arg, high_idle_throttle_threshold_arg, out=None): # Renamed args to avoid clash
+    print(f"\n--- Throttle Anomaly Analysis (Raw Idle Throttle > {high_idle_throttle_threshold_arg*100:.0f}%) ---", file=out)
+    if len(cols.timestamp_unix) == 0:
+        print("No data to analyze.", file=out)
         return
 
-    for i, row in enumerate(log_data):
-        current_state = row.get('state')
-        raw_throttle = row.get('raw_throttle_input_pct', 0.0) 
-        in_gesture = row.get('sim_in_pot_gesture', False)
-        sfx_sound = row.get('sfx_chan_sound', 'None')
-        is_non_gesture_sfx_playing = sfx_sound not in ['None', 'engine_idle_loop.wav'] and 'launch_control' not in sfx_sound
-
-        if current_state == "IDLING" and raw_throttle > high_idle_throttle_threshold_arg and not in_gesture and not is_non_gesture_sfx_playing:
-            anomalies_found += 1
-            print(f"Potential raw throttle anomaly #{anomalies_found} at index {i}:")
-            print(f"  State: {current_state}, Raw Throttle: {raw_throttle:.3f}, Smoothed: {row.get('smoothed_throttle_pct',0.0):.3f}, In Gesture: {in_gesture}, SFX: {sfx_sound}")
-            print_log_excerpt(log_data, i, window=3, label=f"Throttle Anomaly {anomalies_found}")
-            if anomalies_found >= 10:
-                print("More anomalies found but output limited to 10.")
-                break
+    # Classify each distinct SFX name once, then broadcast to rows through the codes
+    non_gesture_sfx_names = np.array([name not in SFX_IDLE_WHITELIST and 'launch_control' not in name
+                                      for name in cols.sfx_names], dtype=bool)
+    non_gesture_sfx_playing = non_gesture_sfx_names[cols.sfx_codes]
+    raw_throttle = cols.raw_throttle_input_pct
+    in_gesture = cols.sim_in_pot_gesture
+    is_idling = np.isin(cols.state_codes, np.flatnonzero(cols.state_names == 'IDLING'))
+    mask = is_idling & (raw_throttle > high_idle_throttle_threshold_arg) & ~in_gesture & ~non_gesture_sfx_playing
+    anomaly_indices = np.flatnonzero(mask)
+
+    for anomaly_num, i in enumerate(anomaly_indices[:10], 1):
+        print(f"Potential raw throttle anomaly #{anomaly_num} at index {i}:", file=out)
+        print(f"  State: {cols.state_names[cols.state_codes[i]]}, Raw Throttle: {raw_throttle[i]:.3f}, Smoothed: {cols.smoothed_throttle_pct[i]:.3f}, "
+              f"In Gesture: {in_gesture[i]}, SFX: {cols.sfx_names[cols.sfx_codes[i]]}", file=out)
+        print_log_excerpt(cols, i, window=3, label=f"Throttle Anomaly {anomaly_num}", out=out)
+    if len(anomaly_indices) > 10:
+        print("More anomalies found but output limited to 10.", file=out)
     
-    if anomalies_found == 0:
-        print("No significant raw throttle anomalies found during IDLING state based on current criteria.")
-    print("--- End Throttle Anomaly Analysis ---")
+    if len(anomaly_indices) == 0:
+        print("No significant raw throttle anomalies found during IDLING state based on current criteria.", file=out)
+    print("--- End Throttle Anomaly Analysis ---", file=out)
 
 
-def analyze_light_blips(log_data, blip_cooldown_arg, rapid_blip_secs_threshold_arg): # Renamed args
-    print(f"\n--- Light Blip Behavior Analysis (Expected Cooldown: {blip_cooldown_arg}s, Rapid Threshold: {rapid_blip_secs_threshold_arg}s) ---")
-    if not log_data or len(log_data) < 2:
-        print("Not enough data to analyze light blips.")
+def analyze_light_blips(cols, blip_cooldown_arg, rapid_blip_secs_threshold_arg, out=None): # Renamed args
+    print(f"\n--- Light Blip Behavior Analysis (Expected Cooldown: {blip_cooldown_arg}s, Rapid Threshold: {rapid_blip_secs_threshold_arg}s) ---", file=out)
+    if len(cols.timestamp_unix) < 2:
+        print("Not enough data to analyze light blips.", file=out)
         return
 
-    blip_trigger_events = []
-    previous_blip_sim_time_from_log = 0.0 
-    
-    for i, row in enumerate(log_data):
-        current_blip_sim_time_from_log = row.get('sim_last_blip_time', 0.0)
-
-        if current_blip_sim_time_from_log > previous_blip_sim_time_from_log and \
-           abs(current_blip_sim_time_from_log - previous_blip_sim_time_from_log) > 0.0001: 
-
-            peak_throttle_for_this_blip_event = row.get('sim_peak_thr_gesture', 0.0)
-
-            blip_trigger_events.append({
-                "index": i,
-                "log_timestamp": row.get('timestamp_unix', 0.0), 
-                "sim_decision_time": current_blip_sim_time_from_log, 
-                "peak_throttle_of_gesture": peak_throttle_for_this_blip_event, 
-                "raw_throttle_at_log_entry": row.get('raw_throttle_input_pct', 0.0),
-                "smoothed_throttle_at_log_entry": row.get('smoothed_throttle_pct', 0.0)
-            })
-        previous_blip_sim_time_from_log = current_blip_sim_time_from_log
+    # A blip was triggered wherever 'sim_last_blip_time' steps up between consecutive rows
+    blip_times = cols.sim_last_blip_time
+    previous_blip_times = np.concatenate(([0.0], blip_times[:-1]))
+    event_indices = np.flatnonzero((blip_times - previous_blip_times) > 0.0001)
+    log_timestamps = cols.timestamp_unix[event_indices]
+    sim_decision_times = blip_times[event_indices]
+    peak_throttles = cols.sim_peak_thr_gesture[event_indices]
+    raw_throttles = cols.raw_throttle_input_pct[event_indices]
+    smoothed_throttles = cols.smoothed_throttle_pct[event_indices]
         
-    print(f"Found {len(blip_trigger_events)} distinct light blip trigger events (based on 'sim_last_blip_time' changes in the log).")
+    print(f"Found {len(event_indices)} distinct light blip trigger events (based on 'sim_last_blip_time' changes in the log).", file=out)
 
-    if not blip_trigger_events:
-        print("No light blip trigger events detected.")
-        print("--- End Light Blip Behavior Analysis ---")
+    if len(event_indices) == 0:
+        print("No light blip trigger events detected.", file=out)
+        print("--- End Light Blip Behavior Analysis ---", file=out)
         return
 
-    print("\nDetails of Light Blip Events:")
-    for idx, event in enumerate(blip_trigger_events):
-        print(f"  Event #{idx+1}: Log Index {event['index']}, "
-              f"Log TS: {event['log_timestamp']:.3f}, "
-              f"SimDecTS: {event['sim_decision_time']:.3f}, "
-              f"PeakSmoothedThrottleInGesture: {event['peak_throttle_of_gesture']:.3f}, "
-              f"RawThrottleAtLog: {event['raw_throttle_at_log_entry']:.3f}, "
-              f"SmoothThrottleAtLog: {event['smoothed_throttle_at_log_entry']:.3f}")
-        if event['peak_throttle_of_gesture'] > 0.40:
-             print(f"    WARNING: Peak smoothed throttle {event['peak_throttle_of_gesture']:.3f} for this light blip event is > 0.40 (but should be <= 0.40 for light blips)!")
-        print_log_excerpt(log_data, event['index'], window=2, label=f"Light Blip Event Detail {idx+1}")
-
-    rapid_blip_sequences = 0
-    for i in range(len(blip_trigger_events) - 1):
-        event1 = blip_trigger_events[i]
-        event2 = blip_trigger_events[i+1]
-        
-        time_diff_sim_decision = event2["sim_decision_time"] - event1["sim_decision_time"]
-        time_diff_log_entry = event2["log_timestamp"] - event1["log_timestamp"]
-
-        if time_diff_sim_decision < blip_cooldown_arg or time_diff_log_entry < rapid_blip_secs_threshold_arg:
-            rapid_blip_sequences += 1
-            print(f"\nPotential rapid/overlapping blip sequence #{rapid_blip_sequences} (between Event {i+1} and Event {i+2}):")
-            print(f"  Time diff (sim_decision_time based): {time_diff_sim_decision:.4f}s")
-            print(f"  Time diff (log timestamp based): {time_diff_log_entry:.4f}s")
-            print_log_excerpt(log_data, event2['index'], window=3, label=f"Rapid Blip (Second in Pair) {rapid_blip_sequences}")
-            
-            if rapid_blip_sequences >= 10:
-                print("More rapid blip sequences found but output limited to 10.")
-                break
+    print("\nDetails of Light Blip Events:", file=out)
+    for idx, log_index in enumerate(event_indices):
+        print(f"  Event #{idx+1}: Log Index {log_index}, "
+              f"Log TS: {log_timestamps[idx]:.3f}, "
+              f"SimDecTS: {sim_decision_times[idx]:.3f}, "
+              f"PeakSmoothedThrottleInGesture: {peak_throttles[idx]:.3f}, "
+              f"RawThrottleAtLog: {raw_throttles[idx]:.3f}, "
+              f"SmoothThrottleAtLog: {smoothed_throttles[idx]:.3f}", file=out)
+        if peak_throttles[idx] > 0.40:
+             print(f"    WARNING: Peak smoothed throttle {peak_throttles[idx]:.3f} for this light blip event is > 0.40 (but should be <= 0.40 for light blips)!", file=out)
+        print_log_excerpt(cols, log_index, window=2, label=f"Light Blip Event Detail {idx+1}", out=out)
+
+    # Pair i is (event i, event i+1); flag pairs closer than the cooldown or the rapid threshold
+    time_diffs_sim_decision = np.diff(sim_decision_times)
+    time_diffs_log_entry = np.diff(log_timestamps)
+    rapid_pairs = _find_rapid_pairs(sim_decision_times, log_timestamps,
+                                    float(blip_cooldown_arg), float(rapid_blip_secs_threshold_arg))
+
+    for rapid_num, i in enumerate(rapid_pairs[:10], 1):
+        print(f"\nPotential rapid/overlapping blip sequence #{rapid_num} (between Event {i+1} and Event {i+2}):", file=out)
+        print(f"  Time diff (sim_decision_time based): {time_diffs_sim_decision[i]:.4f}s", file=out)
+        print(f"  Time diff (log timestamp based): {time_diffs_log_entry[i]:.4f}s", file=out)
+        print_log_excerpt(cols, event_indices[i+1], window=3, label=f"Rapid Blip (Second in Pair) {rapid_num}", out=out)
+    if len(rapid_pairs) > 10:
+        print("More rapid blip sequences found but output limited to 10.", file=out)
                 
-    if rapid_blip_sequences == 0 and len(blip_trigger_events) > 0 :
-        print("\nNo overly rapid/overlapping light blip sequences found based on current criteria.")
+    if len(rapid_pairs) == 0:
+        print("\nNo overly rapid/overlapping light blip sequences found based on current criteria.", file=out)
     
-    print("--- End Light Blip Behavior Analysis ---")
+    print("--- End Light Blip Behavior Analysis ---", file=out)
 
 def main():
     parser = argparse.ArgumentParser(description="Analyze EV Sound Log CSV file.")
@@ -239,17 +343,23 @@ def main():
                         help=f"Throttle % above which is considered suspicious during IDLE (default: {SUSPICIOUSLY_HIGH_IDLE_THROTTLE})")
     parser.add_argument("--rapid_blip_thresh", type=float, default=RAPID_BLIP_THRESHOLD_SECONDS,
                         help=f"Time in seconds within which two blips are 'too rapid' (default: {RAPID_BLIP_THRESHOLD_SECONDS})")
+    parser.add_argument("--no_cache", action="store_true",
+                        help=f"Always re-parse the CSV instead of using or writing '<csv>{PARSE_CACHE_SUFFIX}'")
 
     args = parser.parse_args()
 
     print(f"--- Starting Analysis of: {args.csv_filepath} ---")
     
-    log_data = load_and_parse_csv(args.csv_filepath)
-
-    if log_data:
-        analyze_general_stats(log_data)
-        analyze_throttle_anomalies(log_data, args.deadzone, args.idle_anomaly_thresh)
-        analyze_light_blips(log_data, args.blip_cooldown, args.rapid_blip_thresh)
+    df = load_and_parse_csv(args.csv_filepath, use_cache=not args.no_cache)
+
+    if df is not None:
+        cols = build_log_columns(df)
+        # The reports are collected in one buffer and go out as a single write
+        out = io.StringIO()
+        analyze_general_stats(cols, out=out)
+        analyze_throttle_anomalies(cols, args.deadzone, args.idle_anomaly_thresh, out=out)
+        analyze_light_blips(cols, args.blip_cooldown, args.rapid_blip_thresh, out=out)
+        sys.stdout.write(out.getvalue())
     else:
         print("Could not load or parse log data. Aborting analysis.")
 
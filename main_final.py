@@ -4,9 +4,11 @@ import time
 import random
 import sys
 import signal
+import threading
+import queue
 import csv
-import datetime
-import collections # Added for deque
+import math
+import array
 
 # Attempt to import Raspberry Pi specific ADC modules
 try:
@@ -14,7 +16,6 @@ try:
     import busio
     import digitalio
     import adafruit_mcp3xxx.mcp3008 as MCP
-    from adafruit_mcp3xxx.analog_in import AnalogIn
     RASPI_HW_AVAILABLE = True
 except ImportError:
     RASPI_HW_AVAILABLE = False
@@ -26,12 +27,15 @@ FPS = 60
 ADC_CHANNEL_NUMBER = 0
 MIN_ADC_VALUE = 15823
 MAX_ADC_VALUE = 65535
+ADC_SPAN = MAX_ADC_VALUE - MIN_ADC_VALUE
+ADC_TO_THROTTLE_SCALE = 1.0 / ADC_SPAN if ADC_SPAN > 0 else 0.0 # Multiply instead of dividing every frame
 
 MIXER_FREQUENCY = 44100
 MIXER_SIZE = -16
 MIXER_CHANNELS_STEREO = 2
-MIXER_BUFFER = 512
+MIXER_BUFFER = 1024 # ~23 ms at 44.1 kHz; 512 underran on a loaded Pi
 NUM_PYGAME_MIXER_CHANNELS = 16
+MIXER_VOLUME_LEVELS = 128 # SDL_mixer stores channel volume as int(volume * 128)
 
 THROTTLE_DEADZONE_LOW = 0.05
 SUSTAINED_100_THROTTLE_TIME = 1.5
@@ -65,21 +69,74 @@ CH_LONG_SEQUENCE_B = 3
 CH_LIGHT_BLIP_START = 4
 NUM_LIGHT_BLIP_CHANNELS = 3 # Number of channels dedicated to light blips
 
-adc_throttle_channel = None # Placeholder for ADC channel object
+# Sound file for each key ('light_blip' is a set of variations picked at random)
+SOUND_FILES = {
+    'idle': "engine_idle_loop.wav",
+    'light_blip': ["engine_light_blip_01.wav", "engine_light_blip_02.wav", "engine_light_blip_03.wav"],
+    'turbo_bov': "turbo_spool_and_bov.wav",
+    'rev_limiter': "engine_high_rev_with_limiter.wav",
+    'accel_gears': "acceleration_gears_1_to_4.wav",
+    'cruising': "engine_cruising_loop.wav",
+    'decel_downshifts': "deceleration_downshifts_to_idle.wav",
+    'starter': "engine_starter.wav",
+    'launch_control_engage': "launch_control_engage.wav",
+    'launch_control_hold_loop': "launch_control_hold_loop.wav",
+}
+
+adc_mcp = None # MCP3008 driver object, set by initialize_adc
+adc_pin = None # MCP3008 input pin read for throttle
+ADC_SAMPLE_RATE_HZ = FPS # Sampler thread rate; one sample per frame is all the loop consumes
+adc_latest_value = MIN_ADC_VALUE # Most recent sample, written only by the sampler thread
 
 # Logging and Display
 DISPLAY_UPDATE_INTERVAL = 0.1 # seconds
 LOG_FILE_NAME = "ev_sound_log.csv"
+LOG_WRITE_BUFFER_SIZE = 1 << 16 # Bytes buffered before the CSV log hits the disk
+LOG_FLUSH_INTERVAL = 0.5 # Max seconds the log writer thread holds rows before flushing them to disk
+SHUTDOWN_FADE_WAIT = 0.2 # Max seconds to wait for shutdown fadeouts before quitting the mixer
 LIGHT_BLIP_GESTURE_COOLDOWN = 0.25 # Minimum time between playing light blip sounds
 GESTURE_RETRIGGER_LOCKOUT = 0.3 # Seconds to wait after any gesture before initiating a new one
 
-# --- Moving Average Parameters ---
-THROTTLE_SMOOTHING_WINDOW_SIZE = 5 # Number of samples to average for throttle. Adjust as needed.
-
-log_data = [] # Holds data for CSV logging
+# --- Throttle Smoothing Parameters ---
+# Time constant of the exponential moving average applied to throttle. 0.041s gives the same noise
+# reduction and lag as the previous 5-sample moving average at 60 FPS. Adjust as needed.
+THROTTLE_SMOOTHING_TIME_CONSTANT = 0.041
+
+# CSV log columns, in the order each row is written. Time bases differ:
+#   timestamp_unix is wall-clock time.time() (for ISO timestamps; may jump with NTP or clock changes)
+#   dt and sim_time_* are durations in seconds, measured on time.monotonic()
+#   sim_last_blip_time and sim_gesture_lockout_until are time.monotonic() readings; compare them
+#   only with each other, never with timestamp_unix
+LOG_FIELD_NAMES = [
+    "timestamp_unix", "dt", "state", "raw_adc",
+    "raw_throttle_input_pct", "smoothed_throttle_pct", "sim_current_throttle_pct",
+    "idle_target_vol", "idle_current_vol", "idle_is_fading", "idle_chan_busy",
+    "active_blip_count", "sfx_chan_busy", "sfx_chan_sound",
+    "sm_lc_sounds_active", "sm_waiting_for_lc_hold", "sm_is_lc_active_overall",
+    "long_A_busy", "long_A_sound", "long_B_busy", "long_B_sound", "long_transitioning",
+    "sim_time_@100thr", "sim_time_in_idle", "sim_played_accel_rec",
+    "sim_time_in_lc_range", "sim_in_pot_gesture", "sim_peak_thr_gesture",
+    "sim_last_blip_time", "sim_gesture_lockout_until"
+]
+
+def _log_writer_loop(log_queue, log_file, log_errors):
+    # Runs on the log writer thread: formats and writes queued rows until the None sentinel arrives
+    log_writer = csv.writer(log_file)
+    last_flush_time = time.monotonic()
+    while True:
+        log_row = log_queue.get()
+        if log_row is None: break
+        if log_errors: continue # Writing already failed; keep draining so the queue doesn't grow
+        try:
+            log_writer.writerow(log_row)
+            if time.monotonic() - last_flush_time >= LOG_FLUSH_INTERVAL:
+                log_file.flush()
+                last_flush_time = time.monotonic()
+        except OSError as e_write:
+            log_errors.append(e_write)
 
 def initialize_adc():
-    global adc_throttle_channel
+    global adc_mcp, adc_pin
     if not RASPI_HW_AVAILABLE:
         print("ADC hardware modules not available. Cannot initialize ADC.")
         return False
@@ -90,20 +147,21 @@ def initialize_adc():
         cs = digitalio.DigitalInOut(board.D8) # Using D8 as CS, change if needed
         # Create MCP3008 object
         mcp = MCP.MCP3008(spi, cs)
-        # Create analog input channel on the specified pin
-        adc_throttle_channel = AnalogIn(mcp, getattr(MCP, f"P{ADC_CHANNEL_NUMBER}"))
+        # Keep the driver and pin so each frame is a single read() call (no AnalogIn property layer)
+        adc_pin = getattr(MCP, f"P{ADC_CHANNEL_NUMBER}")
+        adc_mcp = mcp
         print(f"MCP3008 ADC initialized on channel P{ADC_CHANNEL_NUMBER}.")
         return True
     except Exception as e:
         print(f"FATAL ERROR initializing ADC: {e}")
-        adc_throttle_channel = None
+        adc_mcp = None
         return False
 
-def read_adc_value():
-    global adc_throttle_channel
-    if adc_throttle_channel:
+def read_adc_hardware():
+    if adc_mcp is not None:
         try:
-            return adc_throttle_channel.value
+            # Same 16-bit scaling as AnalogIn.value: the 10-bit reading shifted left by 6
+            return adc_mcp.read(adc_pin) << 6
         except Exception as e:
             # print(f"Warning: Could not read ADC value: {e}") # Potentially spammy
             return MIN_ADC_VALUE # Return min value on error to simulate 0 throttle
@@ -111,17 +169,47 @@ def read_adc_value():
         # Simulate 0% throttle if ADC is not available or failed
         return MIN_ADC_VALUE
 
+def _adc_sampler_loop():
+    global adc_latest_value
+    interval = 1.0 / ADC_SAMPLE_RATE_HZ
+    next_sample_time = time.monotonic()
+    while running_script:
+        adc_latest_value = read_adc_hardware() # Single-slot handoff; a plain rebind is atomic
+        next_sample_time += interval
+        delay = next_sample_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_sample_time = time.monotonic() # Fell behind; resume the schedule from now
+
+def start_adc_sampler():
+    # SPI transfers run on their own thread at a fixed rate, so frame timing never waits on the bus
+    global adc_latest_value
+    adc_latest_value = read_adc_hardware()
+    threading.Thread(target=_adc_sampler_loop, name="adc-sampler", daemon=True).start()
+
+def read_adc_value():
+    # Latest sample from the ADC sampler thread (MIN_ADC_VALUE without hardware)
+    return adc_latest_value
+
 def get_throttle_percentage_from_adc(raw_adc_value):
-    if MAX_ADC_VALUE == MIN_ADC_VALUE: return 0.0 # Avoid division by zero
-    # Clamp value to defined min/max range
-    clamped_value = max(MIN_ADC_VALUE, min(raw_adc_value, MAX_ADC_VALUE))
-    # Calculate percentage
-    percentage = (clamped_value - MIN_ADC_VALUE) / (MAX_ADC_VALUE - MIN_ADC_VALUE)
-    return percentage
+    offset = raw_adc_value - MIN_ADC_VALUE
+    # Clamp to the defined min/max range (a zero span always reads as 0%)
+    if offset <= 0 or ADC_SPAN <= 0: return 0.0
+    if offset >= ADC_SPAN: return 1.0
+    return offset * ADC_TO_THROTTLE_SCALE
+
+def list_sound_files():
+    # One directory read instead of a stat per sound file
+    try: return set(os.listdir(SOUND_FILES_PATH))
+    except OSError: return set()
 
 class SoundManager:
     def __init__(self):
         self.sounds = {}
+        self.sound_files_present = list_sound_files() # Lazily loaded sounds are checked against this too
+        self.sound_names_by_id = {} # id(Sound) -> log name, filled in as sounds are loaded
+        self.channel_volume_levels = {} # Last mixer level applied to the idle and long-sequence channels
         self.load_sounds()
         self.channel_idle = pygame.mixer.Channel(CH_IDLE)
         self.channel_turbo_limiter_sfx = pygame.mixer.Channel(CH_TURBO_LIMITER_SFX)
@@ -149,50 +237,66 @@ class SoundManager:
         self.transition_start_time = 0
 
     def load_sounds(self):
-        self.sounds['idle'] = self._load_sound("engine_idle_loop.wav")
-        self.sounds['light_blip'] = [
-            self._load_sound("engine_light_blip_01.wav"),
-            self._load_sound("engine_light_blip_02.wav"),
-            self._load_sound("engine_light_blip_03.wav")
-        ]
-        self.sounds['turbo_bov'] = self._load_sound("turbo_spool_and_bov.wav")
-        self.sounds['rev_limiter'] = self._load_sound("engine_high_rev_with_limiter.wav")
-        self.sounds['accel_gears'] = self._load_sound("acceleration_gears_1_to_4.wav")
-        self.sounds['cruising'] = self._load_sound("engine_cruising_loop.wav")
-        self.sounds['decel_downshifts'] = self._load_sound("deceleration_downshifts_to_idle.wav")
-        self.sounds['starter'] = self._load_sound("engine_starter.wav")
-        self.sounds['launch_control_engage'] = self._load_sound("launch_control_engage.wav")
-        self.sounds['launch_control_hold_loop'] = self._load_sound("launch_control_hold_loop.wav")
+        # Every sound can be triggered from the main loop, so all are decoded up front rather than mid-frame
+        for sound_key in SOUND_FILES:
+            self.get_sound(sound_key)
+        # Fixed after loading; the per-frame launch control checks use these instead of key lookups
+        self.starter_sound = self.get_sound('starter')
+        self.lc_engage_sound = self.get_sound('launch_control_engage')
+        self.lc_hold_sound = self.get_sound('launch_control_hold_loop')
+        self.lc_sounds = frozenset((self.lc_engage_sound, self.lc_hold_sound))
+        self.valid_light_blips = [s for s in (self.get_sound('light_blip') or []) if s is not None]
+
+    def get_sound(self, sound_key):
+        # Cached per key (None if the file is missing or fails to load); load_sounds fills every key at startup
+        if sound_key not in self.sounds:
+            sound_file = SOUND_FILES.get(sound_key)
+            if isinstance(sound_file, list):
+                self.sounds[sound_key] = [self._load_sound(f) for f in sound_file]
+                for i, s_item in enumerate(self.sounds[sound_key]):
+                    if s_item is not None: self.sound_names_by_id[id(s_item)] = f"{sound_key}[{i}]"
+            else:
+                self.sounds[sound_key] = self._load_sound(sound_file) if sound_file else None
+                if self.sounds[sound_key] is not None: self.sound_names_by_id[id(self.sounds[sound_key])] = sound_key
+        return self.sounds[sound_key]
 
     def _load_sound(self, filename):
         path = os.path.join(SOUND_FILES_PATH, filename)
-        if os.path.exists(path):
+        if filename in self.sound_files_present:
             try: return pygame.mixer.Sound(path)
             except pygame.error as e: print(f"Warning: Could not load '{filename}': {e}"); return None
         print(f"Warning: Sound file not found '{filename}' at '{path}'"); return None
 
+    def _set_channel_volume(self, channel, volume):
+        # Skip the SDL call when the mixer would end up at the level it already has
+        level = int(volume * MIXER_VOLUME_LEVELS)
+        if self.channel_volume_levels.get(channel) != level:
+            channel.set_volume(volume)
+            self.channel_volume_levels[channel] = level
+
     def get_sound_name_from_obj(self, sound_obj):
         if sound_obj is None: return "None"
-        for name, sound_asset in self.sounds.items():
-            if isinstance(sound_asset, list): # If the sound is part of a list (like light_blips)
-                for i, s_item in enumerate(sound_asset):
-                    if s_item == sound_obj: return f"{name}[{i}]"
-            elif sound_asset == sound_obj: return name
-        return "UnknownSoundObject"
+        # Loaded sounds stay referenced in self.sounds, so their ids are stable
+        return self.sound_names_by_id.get(id(sound_obj), "UnknownSoundObject")
 
     def update(self):
         # Logic for transitioning from launch_control_engage to launch_control_hold_loop
-        lc_engage_sound = self.sounds.get('launch_control_engage')
-        lc_hold_sound = self.sounds.get('launch_control_hold_loop')
-        current_sfx_sound = self.channel_turbo_limiter_sfx.get_sound()
+        sfx_channel = self.channel_turbo_limiter_sfx
+        lc_engage_sound = self.lc_engage_sound
+        lc_hold_sound = self.lc_hold_sound
+        # Query the channel once per frame; the checks below branch on these locals
+        current_sfx_sound = sfx_channel.get_sound()
+        sfx_busy = sfx_channel.get_busy()
 
         if self.waiting_for_launch_hold_loop:
             # If the engage sound has finished playing
-            if not self.channel_turbo_limiter_sfx.get_busy() or current_sfx_sound != lc_engage_sound:
+            if not sfx_busy or current_sfx_sound != lc_engage_sound:
                 if lc_hold_sound:
-                    self.channel_turbo_limiter_sfx.set_volume(LAUNCH_CONTROL_HOLD_VOL * MASTER_ENGINE_VOL)
-                    self.channel_turbo_limiter_sfx.play(lc_hold_sound, loops=-1)
-                    # self.launch_control_sounds_active remains true
+                    sfx_channel.set_volume(LAUNCH_CONTROL_HOLD_VOL * MASTER_ENGINE_VOL)
+                    sfx_channel.play(lc_hold_sound, loops=-1)
+                    # self.launch_control_sounds_active remains true; re-read the channel now playing the hold loop
+                    current_sfx_sound = sfx_channel.get_sound()
+                    sfx_busy = sfx_channel.get_busy()
                 else: # No hold sound, so LC sequence effectively ends
                     self.launch_control_sounds_active = False
                 self.waiting_for_launch_hold_loop = False
@@ -203,21 +307,21 @@ class SoundManager:
         # Here, we ensure it's false if sounds unexpectedly stop or are not LC sounds.
         if self.launch_control_sounds_active: # Only if we think it *should* be active
             if not self.waiting_for_launch_hold_loop and \
-               (not self.channel_turbo_limiter_sfx.get_busy() or \
-                (current_sfx_sound != lc_engage_sound and current_sfx_sound != lc_hold_sound)):
+               (not sfx_busy or \
+                current_sfx_sound not in self.lc_sounds):
                 # If we are not waiting for hold loop, and the SFX channel is free,
                 # or is playing something other than LC sounds, then LC is no longer active.
                 self.launch_control_sounds_active = False
 
 
     def play_idle(self):
-        idle_sound = self.sounds.get('idle')
+        idle_sound = self.get_sound('idle')
         if idle_sound:
             if not self.channel_idle.get_busy() or self.channel_idle.get_sound() != idle_sound:
                 self.channel_idle.play(idle_sound, loops=-1)
             # Set volume immediately based on current target, fade will adjust if needed
             self.idle_current_volume = self.idle_target_volume # Sync current with target on play
-            self.channel_idle.set_volume(self.idle_current_volume * MASTER_ENGINE_VOL)
+            self._set_channel_volume(self.channel_idle, self.idle_current_volume * MASTER_ENGINE_VOL)
             self.idle_is_fading = abs(self.idle_current_volume - self.idle_target_volume) > 0.01
 
 
@@ -228,7 +332,7 @@ class SoundManager:
             if instant:
                 self.idle_current_volume = target_volume
                 if self.channel_idle.get_sound(): # Check if sound object exists
-                     self.channel_idle.set_volume(self.idle_current_volume * MASTER_ENGINE_VOL)
+                     self._set_channel_volume(self.channel_idle, self.idle_current_volume * MASTER_ENGINE_VOL)
                 self.idle_is_fading = False
             else: # If not instant, enable fading if current volume is different from new target
                 if abs(self.idle_current_volume - self.idle_target_volume) > 0.01:
@@ -236,27 +340,23 @@ class SoundManager:
 
     def update_idle_fade(self, dt):
         if self.idle_is_fading and self.channel_idle.get_busy():
-            if abs(self.idle_current_volume - self.idle_target_volume) < 0.01: # Close enough
+            # Step toward the target at IDLE_TRANSITION_SPEED, landing on it once within a step (or close enough)
+            delta = self.idle_target_volume - self.idle_current_volume
+            step = IDLE_TRANSITION_SPEED * dt
+            if abs(delta) <= max(step, 0.01):
                 self.idle_current_volume = self.idle_target_volume
                 self.idle_is_fading = False
-            elif self.idle_current_volume < self.idle_target_volume:
-                self.idle_current_volume = min(self.idle_current_volume + IDLE_TRANSITION_SPEED * dt, self.idle_target_volume)
-            else: # self.idle_current_volume > self.idle_target_volume
-                self.idle_current_volume = max(self.idle_current_volume - IDLE_TRANSITION_SPEED * dt, self.idle_target_volume)
+            else:
+                self.idle_current_volume += math.copysign(step, delta)
             
             if self.channel_idle.get_sound(): # Check if sound object exists
-                self.channel_idle.set_volume(self.idle_current_volume * MASTER_ENGINE_VOL)
-
-    def stop_idle(self):
-        self.channel_idle.stop()
-        self.idle_is_fading = False # Stop any fading process
+                self._set_channel_volume(self.channel_idle, self.idle_current_volume * MASTER_ENGINE_VOL)
 
     def play_light_blip(self):
         if not self.light_blip_channels: return False # No dedicated channels
-        valid_blips = [s for s in self.sounds.get('light_blip', []) if s is not None]
-        if not valid_blips: return False # No valid blip sounds loaded
+        if not self.valid_light_blips: return False # No valid blip sounds loaded
         
-        sound_to_play = random.choice(valid_blips)
+        sound_to_play = random.choice(self.valid_light_blips)
         for blip_channel in self.light_blip_channels:
             if not blip_channel.get_busy():
                 blip_channel.set_volume(LIGHT_BLIP_VOLUME * MASTER_ENGINE_VOL)
@@ -265,7 +365,7 @@ class SoundManager:
         return False # All blip channels busy
 
     def play_turbo_or_limiter_sfx(self, sound_key):
-        sound_to_play = self.sounds.get(sound_key)
+        sound_to_play = self.get_sound(sound_key)
         if sound_to_play:
             # If launch control is active, stop it before playing other SFX
             if self.is_launch_control_active():
@@ -277,37 +377,26 @@ class SoundManager:
         return False
 
     def play_starter_sfx(self):
-        sound_to_play = self.sounds.get('starter')
+        sound_to_play = self.starter_sound
         if sound_to_play:
             # Ensure it doesn't interrupt an ongoing launch control sequence
-            current_sfx_sound = self.channel_turbo_limiter_sfx.get_sound()
-            lc_engage = self.sounds.get('launch_control_engage')
-            lc_hold = self.sounds.get('launch_control_hold_loop')
-
-            if not self.channel_turbo_limiter_sfx.get_busy() or \
-               (current_sfx_sound != lc_engage and current_sfx_sound != lc_hold):
-                self.channel_turbo_limiter_sfx.stop() # Stop whatever non-LC sound might be playing
-                self.channel_turbo_limiter_sfx.set_volume(MASTER_ENGINE_VOL)
-                self.channel_turbo_limiter_sfx.play(sound_to_play)
+            sfx_channel = self.channel_turbo_limiter_sfx
+            if not sfx_channel.get_busy() or sfx_channel.get_sound() not in self.lc_sounds:
+                sfx_channel.stop() # Stop whatever non-LC sound might be playing
+                sfx_channel.set_volume(MASTER_ENGINE_VOL)
+                sfx_channel.play(sound_to_play)
                 return True
         return False
 
     def stop_turbo_limiter_sfx(self):
         # This should not stop launch control sounds, only other SFX on this channel
-        current_sfx_sound = self.channel_turbo_limiter_sfx.get_sound()
-        lc_engage = self.sounds.get('launch_control_engage')
-        lc_hold = self.sounds.get('launch_control_hold_loop')
-
-        if current_sfx_sound != lc_engage and current_sfx_sound != lc_hold:
+        if self.channel_turbo_limiter_sfx.get_sound() not in self.lc_sounds:
             self.channel_turbo_limiter_sfx.stop()
 
     def is_turbo_limiter_sfx_busy(self):
         # Is the channel busy with something OTHER than launch control sounds?
         if self.channel_turbo_limiter_sfx.get_busy():
-            current_sfx_sound = self.channel_turbo_limiter_sfx.get_sound()
-            lc_engage = self.sounds.get('launch_control_engage')
-            lc_hold = self.sounds.get('launch_control_hold_loop')
-            if current_sfx_sound != lc_engage and current_sfx_sound != lc_hold:
+            if self.channel_turbo_limiter_sfx.get_sound() not in self.lc_sounds:
                 return True
         return False
 
@@ -318,11 +407,8 @@ class SoundManager:
         
         # Check main SFX channel for non-LC sounds
         if self.channel_turbo_limiter_sfx.get_busy():
-            current_sfx_sound = self.channel_turbo_limiter_sfx.get_sound()
-            lc_engage = self.sounds.get('launch_control_engage')
-            lc_hold = self.sounds.get('launch_control_hold_loop')
             # If it's busy and NOT a launch control sound, then a playful SFX is active
-            if current_sfx_sound != lc_engage and current_sfx_sound != lc_hold:
+            if self.channel_turbo_limiter_sfx.get_sound() not in self.lc_sounds:
                 return True
         return False
 
@@ -334,21 +420,23 @@ class SoundManager:
 
 
     def play_launch_control_sequence(self):
-        engage_sound = self.sounds.get('launch_control_engage')
-        hold_sound = self.sounds.get('launch_control_hold_loop')
+        engage_sound = self.lc_engage_sound
+        hold_sound = self.lc_hold_sound
+
+        sfx_channel = self.channel_turbo_limiter_sfx
 
         if engage_sound:
-            self.channel_turbo_limiter_sfx.stop() # Stop anything else on this channel
-            self.channel_turbo_limiter_sfx.set_volume(LAUNCH_CONTROL_ENGAGE_VOL * MASTER_ENGINE_VOL)
-            self.channel_turbo_limiter_sfx.play(engage_sound)
+            sfx_channel.stop() # Stop anything else on this channel
+            sfx_channel.set_volume(LAUNCH_CONTROL_ENGAGE_VOL * MASTER_ENGINE_VOL)
+            sfx_channel.play(engage_sound)
             self.waiting_for_launch_hold_loop = True
             self.launch_control_sounds_active = True # LC is now active
             return True
         elif hold_sound: # Fallback if engage sound is missing
             print("Launch control engage sound missing, playing hold loop directly.")
-            self.channel_turbo_limiter_sfx.stop()
-            self.channel_turbo_limiter_sfx.set_volume(LAUNCH_CONTROL_HOLD_VOL * MASTER_ENGINE_VOL)
-            self.channel_turbo_limiter_sfx.play(hold_sound, loops=-1)
+            sfx_channel.stop()
+            sfx_channel.set_volume(LAUNCH_CONTROL_HOLD_VOL * MASTER_ENGINE_VOL)
+            sfx_channel.play(hold_sound, loops=-1)
             self.waiting_for_launch_hold_loop = False # No waiting needed
             self.launch_control_sounds_active = True # LC is now active
             return True
@@ -358,15 +446,11 @@ class SoundManager:
         return False
 
     def stop_launch_control_sequence(self, fade_ms=FADE_OUT_MS // 2):
-        current_sfx_sound = self.channel_turbo_limiter_sfx.get_sound()
-        lc_engage = self.sounds.get('launch_control_engage')
-        lc_hold = self.sounds.get('launch_control_hold_loop')
-
+        sfx_channel = self.channel_turbo_limiter_sfx
         # Only stop if a launch control sound is actually playing
-        if self.channel_turbo_limiter_sfx.get_busy() and \
-           (current_sfx_sound == lc_engage or current_sfx_sound == lc_hold):
-            if fade_ms > 0: self.channel_turbo_limiter_sfx.fadeout(fade_ms)
-            else: self.channel_turbo_limiter_sfx.stop()
+        if sfx_channel.get_busy() and sfx_channel.get_sound() in self.lc_sounds:
+            if fade_ms > 0: sfx_channel.fadeout(fade_ms)
+            else: sfx_channel.stop()
         
         self.waiting_for_launch_hold_loop = False
         self.launch_control_sounds_active = False # LC is no longer active
@@ -376,7 +460,7 @@ class SoundManager:
         return self.launch_control_sounds_active or self.waiting_for_launch_hold_loop
     
     def play_long_sequence(self, sound_key, loops=0, transition_from_other=False):
-        sound_to_play = self.sounds.get(sound_key)
+        sound_to_play = self.get_sound(sound_key)
         if not sound_to_play:
             print(f"Long sequence sound key '{sound_key}' not found.")
             # Stop both long channels if the requested sound is missing
@@ -391,7 +475,7 @@ class SoundManager:
             other_channel = self.channel_long_B if self.active_long_channel == self.channel_long_A else self.channel_long_A
             other_channel.stop()
             # Play on the currently active channel
-            self.active_long_channel.set_volume(MASTER_ENGINE_VOL)
+            self._set_channel_volume(self.active_long_channel, MASTER_ENGINE_VOL)
             self.active_long_channel.play(sound_to_play, loops=loops)
             self.transitioning_long_sound = False
         else:
@@ -401,45 +485,67 @@ class SoundManager:
 
             fade_out_channel.fadeout(CROSSFADE_DURATION_MS)
             
-            fade_in_channel.set_volume(0) # Start silent
+            self._set_channel_volume(fade_in_channel, 0) # Start silent
             fade_in_channel.play(sound_to_play, loops=loops)
             
             self.active_long_channel = fade_in_channel # Switch active channel
             self.transitioning_long_sound = True
-            self.transition_start_time = time.time()
+            self.transition_start_time = time.monotonic()
 
     def update_long_sequence_crossfade(self):
         if self.transitioning_long_sound:
-            elapsed_time_ms = (time.time() - self.transition_start_time) * 1000
+            elapsed_time_ms = (time.monotonic() - self.transition_start_time) * 1000
             progress = min(1.0, elapsed_time_ms / CROSSFADE_DURATION_MS)
             
             if self.active_long_channel.get_busy(): # Check if the new channel is playing
-                 self.active_long_channel.set_volume(progress * MASTER_ENGINE_VOL)
+                 self._set_channel_volume(self.active_long_channel, progress * MASTER_ENGINE_VOL)
 
             if progress >= 1.0:
                 self.transitioning_long_sound = False
                 # Ensure final volume is set correctly if sound is still playing
                 if self.active_long_channel.get_busy():
-                    self.active_long_channel.set_volume(MASTER_ENGINE_VOL)
+                    self._set_channel_volume(self.active_long_channel, MASTER_ENGINE_VOL)
 
-    def stop_long_sequence(self, fade_ms=0):
-        if fade_ms > 0:
-            self.channel_long_A.fadeout(fade_ms)
-            self.channel_long_B.fadeout(fade_ms)
-        else:
-            self.channel_long_A.stop()
-            self.channel_long_B.stop()
+    def fade_out_all_sounds(self, fade_ms):
+        # A single mixer call fades every channel (idle, SFX, long sequences and blips)
+        pygame.mixer.fadeout(fade_ms)
+        self.idle_is_fading = False
+        self.waiting_for_launch_hold_loop = False
+        self.launch_control_sounds_active = False
         self.transitioning_long_sound = False
 
     def is_long_sequence_busy(self):
         return self.channel_long_A.get_busy() or self.channel_long_B.get_busy() or self.transitioning_long_sound
 
+    def get_log_snapshot(self):
+        # Values for the idle_target_vol..long_transitioning slice of LOG_FIELD_NAMES
+        return (
+            self.idle_target_volume,
+            self.idle_current_volume,
+            self.idle_is_fading,
+            self.channel_idle.get_busy(),
+            self.get_active_blip_count(),
+            self.channel_turbo_limiter_sfx.get_busy(), # Overall busy state
+            self.get_sound_name_from_obj(self.channel_turbo_limiter_sfx.get_sound()),
+            self.launch_control_sounds_active, # SoundManager's view of LC
+            self.waiting_for_launch_hold_loop,
+            self.is_launch_control_active(), # Combined LC state
+            self.channel_long_A.get_busy(),
+            self.get_sound_name_from_obj(self.channel_long_A.get_sound()),
+            self.channel_long_B.get_busy(),
+            self.get_sound_name_from_obj(self.channel_long_B.get_sound()),
+            self.transitioning_long_sound,
+        )
+
 class EngineSimulation:
     def __init__(self, sound_manager):
         self.sm = sound_manager
         self.state = "ENGINE_OFF" 
         self.current_throttle = 0.0 # This will now store the SMOOTHED throttle
-        self.throttle_history = collections.deque(maxlen=GESTURE_MAX_POINTS) # Using deque for history   
+        # Fixed-size ring buffer of throttle samples for gesture detection; preallocated so pushes don't allocate
+        self.throttle_history_values = array.array('d', [0.0] * GESTURE_MAX_POINTS)
+        self.throttle_history_head = 0 # Slot the next sample is written to
+        self.throttle_history_count = 0
         self.peak_throttle_in_gesture = 0.0
         self.gesture_start_time = 0.0
         self.in_potential_gesture = False
@@ -455,14 +561,24 @@ class EngineSimulation:
         self.time_in_launch_control_range = 0.0
 
 
+    def _record_throttle_sample(self, throttle):
+        head = self.throttle_history_head
+        self.throttle_history_values[head] = throttle
+        self.throttle_history_head = (head + 1) % GESTURE_MAX_POINTS
+        if self.throttle_history_count < GESTURE_MAX_POINTS:
+            self.throttle_history_count += 1
+
+    def _previous_throttle_sample(self):
+        # Throttle of the sample before the most recent one (caller ensures at least two are recorded)
+        return self.throttle_history_values[(self.throttle_history_head - 2) % GESTURE_MAX_POINTS]
+
     def update(self, dt, new_throttle_value): # new_throttle_value is now the SMOOTHED throttle
         previous_throttle_this_frame = self.current_throttle
         self.current_throttle = new_throttle_value # Use the smoothed value directly
-        current_time = time.time()
+        current_time = time.monotonic() # Gesture windows and cooldowns must not jump with wall-clock changes
 
         # Throttle history for gesture detection should use the (now smoothed) current_throttle
-        self.throttle_history.append((current_time, self.current_throttle))
-        # self.throttle_history = self.throttle_history[-GESTURE_MAX_POINTS:] # Deque handles maxlen
+        self._record_throttle_sample(self.current_throttle)
 
         self.sm.update_long_sequence_crossfade()
         self.sm.update_idle_fade(dt)
@@ -476,7 +592,7 @@ class EngineSimulation:
                 self.sm.play_starter_sfx()
                 # Optional: Reset throttle briefly to prevent immediate revving after start
                 self.current_throttle = 0.0 
-                self.throttle_history.append((current_time, self.current_throttle))
+                self._record_throttle_sample(self.current_throttle)
 
 
         elif self.state == "STARTING":
@@ -568,7 +684,7 @@ class EngineSimulation:
                 self.state = "IDLING"
                 self.sm.stop_launch_control_sequence() # Ensure sounds are stopped
                 self.sm.set_idle_target_volume(NORMAL_IDLE_VOLUME)
-                if self.sm.sounds.get('idle'): self.sm.play_idle() # Re-start idle if not playing
+                if self.sm.get_sound('idle'): self.sm.play_idle() # Re-start idle if not playing
                 self.time_in_idle = 0.0
 
 
@@ -609,9 +725,22 @@ class EngineSimulation:
                 if self.state != "IDLING": print("\nBack to Idling (from decel end).")
                 self.state = "IDLING"
                 self.sm.set_idle_target_volume(NORMAL_IDLE_VOLUME)
-                if self.sm.sounds.get('idle'): self.sm.play_idle()
+                if self.sm.get_sound('idle'): self.sm.play_idle()
                 self.time_in_idle = 0.0
 
+    def get_log_snapshot(self):
+        # Values for the sim_time_@100thr..sim_gesture_lockout_until slice of LOG_FIELD_NAMES
+        return (
+            self.time_at_100_throttle,
+            self.time_in_idle,
+            self.played_full_accel_sequence_recently,
+            self.time_in_launch_control_range,
+            self.in_potential_gesture,
+            self.peak_throttle_in_gesture,
+            self.last_light_blip_played_time,
+            self.gesture_lockout_until_time,
+        )
+
     def _check_playful_gestures(self, current_time, old_throttle_value_for_frame):
         if self.sm.is_long_sequence_busy() or self.state == "LAUNCH_HOLD" or self.sm.is_launch_control_active():
             self.in_potential_gesture = False # Cannot do playful gestures during these
@@ -620,7 +749,7 @@ class EngineSimulation:
         # Try to start a new gesture ONLY if not in lockout and conditions met
         if not self.in_potential_gesture and current_time >= self.gesture_lockout_until_time:
             # Condition to start a gesture: throttle rises from deadzone
-            is_rising_from_idle = (len(self.throttle_history) < 2 or self.throttle_history[-2][1] <= THROTTLE_DEADZONE_LOW)
+            is_rising_from_idle = (self.throttle_history_count < 2 or self._previous_throttle_sample() <= THROTTLE_DEADZONE_LOW)
             if self.current_throttle > THROTTLE_DEADZONE_LOW and is_rising_from_idle:
                 self.in_potential_gesture = True
                 self.gesture_start_time = current_time
@@ -695,11 +824,13 @@ def update_display(sim_state, current_throttle_smoothed, raw_throttle_pct, raw_a
     print(f"\r{status_string:<145}", end='', flush=True) # Ensure enough padding to overwrite previous line
 
 def main():
-    global running_script, adc_throttle_channel, log_data
+    global running_script
     # Setup signal handlers for graceful exit
     signal.signal(signal.SIGINT, signal_handler_main)
     signal.signal(signal.SIGTERM, signal_handler_main)
 
+    # pygame.init() opens the mixer itself, so our settings must be registered first or the mixer.init below is a no-op
+    pygame.mixer.pre_init(frequency=MIXER_FREQUENCY, size=MIXER_SIZE, channels=MIXER_CHANNELS_STEREO, buffer=MIXER_BUFFER)
     pygame.init() # Initialize all Pygame modules
     
     actual_channels = 0
@@ -750,7 +881,8 @@ def main():
             # If ADC init fails, run in simulated mode with 0% throttle
             print("--- FAILED TO INITIALIZE ADC. SIMULATING 0% THROTTLE (MIN_ADC_VALUE) ---")
         else:
-            print("--- RUNNING WITH RASPBERRY PI ADC HARDWARE ---")
+            start_adc_sampler()
+            print(f"--- RUNNING WITH RASPBERRY PI ADC HARDWARE (sampling at {ADC_SAMPLE_RATE_HZ} Hz) ---")
 
     # Ensure sound directory exists
     os.makedirs(SOUND_FILES_PATH, exist_ok=True)
@@ -759,25 +891,22 @@ def main():
         "engine_idle_loop.wav", "engine_light_blip_01.wav", # ... add more as needed
         "launch_control_engage.wav", "launch_control_hold_loop.wav", "acceleration_gears_1_to_4.wav"
     ]
-    missing_files = any(not os.path.exists(os.path.join(SOUND_FILES_PATH, sf)) for sf in sound_files_to_check)
+    sound_files_present = list_sound_files()
+    missing_files = [sf for sf in sound_files_to_check if sf not in sound_files_present]
     if missing_files:
-        for sf in sound_files_to_check:
-            if not os.path.exists(os.path.join(SOUND_FILES_PATH, sf)):
-                print(f"Warning: Essential sound file '{sf}' not found in '{SOUND_FILES_PATH}/'. Please add it.")
+        for sf in missing_files:
+            print(f"Warning: Essential sound file '{sf}' not found in '{SOUND_FILES_PATH}/'. Please add it.")
         print("--- Some essential sound files are missing. Functionality will be significantly affected. ---")
 
 
     sound_manager_instance = SoundManager() 
     simulation = EngineSimulation(sound_manager_instance)
     
-    # Initialize deque for throttle smoothing
-    throttle_buffer = collections.deque(maxlen=THROTTLE_SMOOTHING_WINDOW_SIZE)
-    # Pre-fill buffer with initial zero throttle to avoid skewed average at start
-    for _ in range(THROTTLE_SMOOTHING_WINDOW_SIZE):
-        throttle_buffer.append(0.0)
+    # Smoothed throttle starts from zero, like the engine
+    smoothed_throttle_percentage = 0.0
 
     print("\nEV Sound Simulation Running (Headless)...")
-    print(f"Throttle smoothing window: {THROTTLE_SMOOTHING_WINDOW_SIZE} samples")
+    print(f"Throttle smoothing time constant: {THROTTLE_SMOOTHING_TIME_CONSTANT}s")
     print(f"Gesture peak thresholds: Light Blip <= 40%, Turbo 45-70%, Rev Limiter > 70%") # Updated Turbo threshold
     print(f"Gesture Retrigger Lockout: {GESTURE_RETRIGGER_LOCKOUT}s")
     print(f"Blip Cooldown: {LIGHT_BLIP_GESTURE_COOLDOWN}s")
@@ -788,12 +917,30 @@ def main():
     print("Press Ctrl+C to exit gracefully.\n")
 
 
-    last_time = time.time()
-    last_display_update_time = time.time()
+    # Open the CSV log up front; rows are handed to a writer thread so formatting and disk I/O stay off the loop
+    log_file = None
+    log_queue = None
+    log_thread = None
+    log_errors = [] # Filled by the writer thread if a write fails
+    try:
+        log_file = open(LOG_FILE_NAME, 'w', newline='', buffering=LOG_WRITE_BUFFER_SIZE)
+        csv.writer(log_file).writerow(LOG_FIELD_NAMES)
+    except OSError as e_log:
+        print(f"Error opening CSV log '{LOG_FILE_NAME}': {e_log}. Logging disabled.")
+        log_file = None
+    if log_file:
+        log_queue = queue.SimpleQueue()
+        log_thread = threading.Thread(target=_log_writer_loop, args=(log_queue, log_file, log_errors),
+                                      name="log-writer", daemon=True)
+        log_thread.start()
+
+    # Frame timing uses the monotonic clock; only the logged timestamp is wall-clock time
+    last_time = time.monotonic()
+    last_display_update_time = last_time
 
     try:
         while running_script:
-            current_time_loop = time.time()
+            current_time_loop = time.monotonic()
             dt = current_time_loop - last_time
             if dt <= 0: dt = 1/FPS # Ensure dt is positive and non-zero
             last_time = current_time_loop
@@ -801,48 +948,24 @@ def main():
             raw_adc = read_adc_value()
             raw_throttle_percentage = get_throttle_percentage_from_adc(raw_adc)
             
-            # Apply moving average
-            throttle_buffer.append(raw_throttle_percentage)
-            smoothed_throttle_percentage = sum(throttle_buffer) / len(throttle_buffer)
+            # Exponential moving average; weighting by dt keeps the smoothing steady if frames are late
+            smoothing_alpha = 1.0 - math.exp(-dt / THROTTLE_SMOOTHING_TIME_CONSTANT)
+            smoothed_throttle_percentage += smoothing_alpha * (raw_throttle_percentage - smoothed_throttle_percentage)
             
             simulation.update(dt, smoothed_throttle_percentage) # Pass smoothed value to simulation
             # sound_manager_instance.update() # Already called within simulation.update() for LC transition
 
-            # Log data (consider moving to a less frequent interval if performance is an issue)
-            log_entry = {
-                "timestamp_unix": current_time_loop,
-                "datetime_iso": datetime.datetime.now().isoformat(),
-                "dt": dt,
-                "state": simulation.state,
-                "raw_adc": raw_adc,
-                "raw_throttle_input_pct": raw_throttle_percentage,
-                "smoothed_throttle_pct": smoothed_throttle_percentage,
-                "sim_current_throttle_pct": simulation.current_throttle, # This is the smoothed value used by sim
-                "idle_target_vol": sound_manager_instance.idle_target_volume,
-                "idle_current_vol": sound_manager_instance.idle_current_volume,
-                "idle_is_fading": sound_manager_instance.idle_is_fading,
-                "idle_chan_busy": sound_manager_instance.channel_idle.get_busy(),
-                "active_blip_count": sound_manager_instance.get_active_blip_count(),
-                "sfx_chan_busy": sound_manager_instance.channel_turbo_limiter_sfx.get_busy(), # Overall busy state
-                "sfx_chan_sound": sound_manager_instance.get_sound_name_from_obj(sound_manager_instance.channel_turbo_limiter_sfx.get_sound()),
-                "sm_lc_sounds_active": sound_manager_instance.launch_control_sounds_active, # SoundManager's view of LC
-                "sm_waiting_for_lc_hold": sound_manager_instance.waiting_for_launch_hold_loop,
-                "sm_is_lc_active_overall": sound_manager_instance.is_launch_control_active(), # Combined LC state from SM
-                "long_A_busy": sound_manager_instance.channel_long_A.get_busy(),
-                "long_A_sound": sound_manager_instance.get_sound_name_from_obj(sound_manager_instance.channel_long_A.get_sound()),
-                "long_B_busy": sound_manager_instance.channel_long_B.get_busy(),
-                "long_B_sound": sound_manager_instance.get_sound_name_from_obj(sound_manager_instance.channel_long_B.get_sound()),
-                "long_transitioning": sound_manager_instance.transitioning_long_sound,
-                "sim_time_@100thr": simulation.time_at_100_throttle,
-                "sim_time_in_idle": simulation.time_in_idle,
-                "sim_played_accel_rec": simulation.played_full_accel_sequence_recently,
-                "sim_time_in_lc_range": simulation.time_in_launch_control_range,
-                "sim_in_pot_gesture": simulation.in_potential_gesture,
-                "sim_peak_thr_gesture": simulation.peak_throttle_in_gesture,
-                "sim_last_blip_time": simulation.last_light_blip_played_time,
-                "sim_gesture_lockout_until": simulation.gesture_lockout_until_time # Log new lockout time
-            }
-            log_data.append(log_entry)
+            # Log data (row order must match LOG_FIELD_NAMES)
+            if log_queue:
+                log_queue.put((
+                    time.time(), # Readers derive wall-clock ISO time from this
+                    dt,
+                    simulation.state,
+                    raw_adc,
+                    raw_throttle_percentage,
+                    smoothed_throttle_percentage,
+                    simulation.current_throttle, # This is the smoothed value used by sim
+                ) + sound_manager_instance.get_log_snapshot() + simulation.get_log_snapshot())
 
             if current_time_loop - last_display_update_time >= DISPLAY_UPDATE_INTERVAL:
                 update_display(
@@ -858,7 +981,7 @@ def main():
                 last_display_update_time = current_time_loop
 
             # Frame rate limiting
-            processing_time = time.time() - current_time_loop
+            processing_time = time.monotonic() - current_time_loop
             sleep_duration = max(0, (1.0 / FPS) - processing_time)
             time.sleep(sleep_duration)
 
@@ -871,47 +994,29 @@ def main():
         print(f"\r{' ' * 145}\r", end='', flush=True) # Clear display line again
         print("\nInitiating final cleanup...")
         
-        # Save log data to CSV
-        if log_data:
-            print(f"Writing log data to {LOG_FILE_NAME}...")
+        # Let the writer thread finish the queued rows, then flush and close the CSV log
+        if log_file:
+            log_queue.put(None)
+            log_thread.join()
             try:
-                field_names = set()
-                for entry in log_data:
-                    field_names.update(entry.keys())
-                
-                preferred_order = [
-                    "timestamp_unix", "datetime_iso", "dt", "state", "raw_adc",
-                    "raw_throttle_input_pct", "smoothed_throttle_pct", "sim_current_throttle_pct",
-                    "idle_target_vol", "idle_current_vol", "idle_is_fading", "idle_chan_busy",
-                    "active_blip_count", "sfx_chan_busy", "sfx_chan_sound",
-                    "sm_lc_sounds_active", "sm_waiting_for_lc_hold", "sm_is_lc_active_overall",
-                    "long_A_busy", "long_A_sound", "long_B_busy", "long_B_sound", "long_transitioning",
-                    "sim_time_@100thr", "sim_time_in_idle", "sim_played_accel_rec",
-                    "sim_time_in_lc_range", "sim_in_pot_gesture", "sim_peak_thr_gesture",
-                    "sim_last_blip_time", "sim_gesture_lockout_until"
-                ]
-                final_fieldnames = [f for f in preferred_order if f in field_names]
-                final_fieldnames.extend(sorted([f for f in field_names if f not in final_fieldnames]))
-
-                with open(LOG_FILE_NAME, 'w', newline='') as csvfile:
-                    writer = csv.DictWriter(csvfile, fieldnames=final_fieldnames, extrasaction='ignore')
-                    writer.writeheader()
-                    writer.writerows(log_data)
+                log_file.close()
+            except OSError as e_csv:
+                log_errors.append(e_csv)
+            if log_errors:
+                print(f"Error writing CSV log: {log_errors[0]}")
+            else:
                 print(f"Log successfully written to {LOG_FILE_NAME}")
-            except Exception as e_csv:
-                print(f"Error writing CSV log: {e_csv}")
         else:
             print("No log data to write.")
 
         # Stop all sounds and quit Pygame
         if 'sound_manager_instance' in locals() and sound_manager_instance and pygame.mixer.get_init():
             print("Stopping sounds...")
-            sound_manager_instance.stop_launch_control_sequence(fade_ms=100) # Fade out LC if active
-            sound_manager_instance.stop_idle()
-            sound_manager_instance.stop_long_sequence(fade_ms=100) # Fade out long sequences
-            sound_manager_instance.stop_all_light_blips()
-            sound_manager_instance.stop_turbo_limiter_sfx() # Stop other SFX
-            time.sleep(0.2) # Allow time for fadeouts to complete
+            sound_manager_instance.fade_out_all_sounds(100)
+            # Allow time for fadeouts to complete, but return as soon as the mixer is silent
+            shutdown_deadline = time.monotonic() + SHUTDOWN_FADE_WAIT
+            while pygame.mixer.get_busy() and time.monotonic() < shutdown_deadline:
+                time.sleep(0.01)
         
         if pygame.mixer.get_init(): pygame.mixer.quit()
         if pygame.get_init(): pygame.quit() # Quit Pygame itself